@@ -5,40 +5,158 @@ County-Based Data Collector
 - Uses counties.json configuration file
 - Ensures complete data collection with retry logic
 - Prompts for API key if not available
-- Saves progress after every city to prevent data loss
+- Saves progress after every year to prevent data loss
 """
 
 import requests
+from requests.adapters import HTTPAdapter
 import pandas as pd
+import numpy as np
 import time
+import threading
 import json
 import os
 import getpass
+import hashlib
+import argparse
 from typing import List, Dict, Tuple, Set
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Use orjson's faster decoder for Census responses when it is installed
+try:
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+def _haversine_vec(lat0, lon0, lats, lons):
+    """Distance in miles from (lat0, lon0) to each of the given coordinates"""
+    lat0, lon0 = np.radians(lat0), np.radians(lon0)
+    lats, lons = np.radians(lats), np.radians(lons)
+    
+    # Haversine formula over whole arrays
+    a = np.sin((lats - lat0) / 2)**2 + np.cos(lat0) * np.cos(lats) * np.sin((lons - lon0) / 2)**2
+    return 2 * 3956 * np.arcsin(np.sqrt(a))
+
+class RateLimiter:
+    """Token bucket shared across worker threads; only blocks when requests outpace the rate"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate  # Tokens added per second
+        self.burst = burst  # Bucket capacity
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+        
+    def acquire(self):
+        """Take one token, sleeping until it is available"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            
+            # Reserve the token now and sleep off any deficit outside the lock
+            self.tokens -= 1
+            wait_time = -self.tokens / self.rate if self.tokens < 0 else 0
+            
+        if wait_time:
+            time.sleep(wait_time)
 
 class CountyBasedDataCollector:
-    def __init__(self, api_key: str = None):
+    # ACS 5-year variables we collect, in the order _parse_demographic_row reads them
+    ACS_VARIABLES = [
+        'B01003_001E',  # Total population
+        'B02001_002E',  # White alone
+        'B02001_003E',  # Black alone
+        'B02001_005E',  # Asian alone
+        'B02001_008E',  # Two or more races
+        'B03003_003E',  # Hispanic or Latino
+        'B04006_047E',  # German ancestry
+        'B04006_018E',  # Irish ancestry
+        'B04006_010E',  # English ancestry
+        'B04006_065E',  # Mexican ancestry
+        'B04006_001E',  # Total ancestry (for Indian calculation)
+        'B02001_006E',  # American Indian and Alaska Native alone
+        'B04006_077E',  # Chinese ancestry
+        'B04006_024E',  # French ancestry
+        'B04006_039E',  # Italian ancestry
+        'B04006_079E',  # Korean ancestry
+    ]
+    ACS_GET = ','.join(['NAME'] + ACS_VARIABLES)
+    
+    # Output field -> position in a response row (row[0] is NAME; total ancestry at 11 is unused)
+    FIELD_MAP = [
+        ('total_population', 1), ('white_alone', 2), ('black_alone', 3), ('asian_alone', 4),
+        ('two_or_more_races', 5), ('hispanic_latino', 6), ('german', 7), ('irish', 8),
+        ('english', 9), ('mexican', 10), ('indian', 12), ('chinese', 13),
+        ('french', 14), ('italian', 15), ('korean', 16),
+    ]
+    
+    # Population counts are parsed straight to int and fit comfortably in int32
+    COUNT_DTYPES = {field: 'int32' for field in [name for name, _ in FIELD_MAP] + ['vietnamese']}
+    # Count cells an older CSV left blank are filled with 0
+    MISSING_COUNTS = dict.fromkeys(COUNT_DTYPES, 0)
+    
+    # Empty cells and Census annotation values for unavailable estimates
+    MISSING_VALUES = frozenset({None, '', '-666666666', '-999999999'})
+    RECENT_CACHE_MAX_AGE = 24 * 60 * 60  # Cache lifetime in seconds for the latest ACS years
+    
+    # Column layout of north_texas_county_demographics.csv
+    OUTPUT_COLUMNS = [
+        'name', 'total_population', 'white_alone', 'black_alone', 'asian_alone',
+        'two_or_more_races', 'hispanic_latino', 'german', 'irish', 'english',
+        'mexican', 'indian', 'chinese', 'vietnamese', 'french', 'italian', 'korean',
+        'place_fips', 'year', 'city', 'county', 'county_fips', 'all_counties',
+        'latitude', 'longitude', 'coordinates', 'distance_from_dallas'
+    ]
+    
+    def __init__(self, api_key: str = None, refresh_cache: bool = False):
         self.base_url = "https://api.census.gov/data"
+        self.cache_dir = Path(".census_cache")  # On-disk cache of Census API responses
+        self.refresh_cache = refresh_cache
+        self.session = self.create_session()
+        self.dallas_coords = (32.7767, -96.7970)  # Dallas coordinates for distance calculation
         self.counties = self.load_counties_config()
         self.coordinates_lookup = self.load_coordinates_lookup()
         self.api_key = self.get_api_key(api_key)
-        self.dallas_coords = (32.7767, -96.7970)  # Dallas coordinates for distance calculation
+        # Keyed requests get a much higher allowance from the Census API
+        self.rate_limiter = RateLimiter(rate=10, burst=10) if self.api_key else RateLimiter(rate=2, burst=2)
+        
+        # Query parameters shared by every request; only the place clause varies
+        self.base_params = {'get': self.ACS_GET, 'in': 'state:48'}
+        if self.api_key:
+            self.base_params['key'] = self.api_key
+        
+    def create_session(self) -> requests.Session:
+        """Create a pooled HTTP session so Census requests reuse connections"""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8)
+        session.mount('https://', adapter)
+        return session
         
     def load_coordinates_lookup(self) -> Dict[int, Dict]:
         """Load place coordinates from the Texas places coordinate file"""
         try:
-            import pandas as pd
-            coords_df = pd.read_csv('texas_place_coordinates.csv')
-            
-            # Create lookup dictionary: place_fips -> {lat, lon, coordinates}
-            lookup = {}
-            for _, row in coords_df.iterrows():
-                lookup[int(row['place_fips'])] = {
-                    'latitude': row['latitude'],
-                    'longitude': row['longitude'], 
-                    'coordinates': row['coordinates']
-                }
+            # Only the columns the lookup needs, with explicit types so pandas skips inference
+            coords_df = pd.read_csv(
+                'texas_place_coordinates.csv',
+                usecols=['place_fips', 'latitude', 'longitude', 'coordinates'],
+                dtype={'place_fips': 'int64', 'latitude': 'float64', 'longitude': 'float64', 'coordinates': 'str'}
+            )
+            
+            # Distance from Dallas for every place in one vectorized pass
+            distances = _haversine_vec(*self.dallas_coords,
+                                       coords_df['latitude'].to_numpy(),
+                                       coords_df['longitude'].to_numpy())
+            coords_df['distance_from_dallas'] = np.round(distances, 1)
+            
+            # Create lookup dictionary: place_fips -> {lat, lon, coordinates, distance}
+            # built column-wise from the arrays rather than row by row
+            lookup = (coords_df
+                      .set_index('place_fips')
+                      [['latitude', 'longitude', 'coordinates', 'distance_from_dallas']]
+                      .to_dict('index'))
                 
             print(f"📍 Loaded coordinates for {len(lookup)} Texas places")
             return lookup
@@ -50,26 +168,6 @@ class CountyBasedDataCollector:
             print(f"⚠️ Error loading coordinates: {e}")
             return {}
             
-    def calculate_distance(self, coord1, coord2):
-        """Calculate distance between two coordinates in miles"""
-        import math
-        
-        lat1, lon1 = coord1
-        lat2, lon2 = coord2
-        
-        # Convert to radians
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        
-        # Haversine formula
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat/2)**2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon/2)**2
-        c = 2 * math.asin(math.sqrt(a))
-        
-        # Earth's radius in miles
-        r = 3956
-        return c * r
-        
     def get_api_key(self, provided_key: str = None) -> str:
         """Get API key from environment, parameter, or user prompt"""
         
@@ -140,8 +238,13 @@ class CountyBasedDataCollector:
         print(f"📍 Loading Texas places from {places_file}...")
         
         try:
-            import pandas as pd
-            df = pd.read_csv(places_file, sep='|')
+            # Only the columns the county filter needs, with explicit types
+            df = pd.read_csv(
+                places_file,
+                sep='|',
+                usecols=['PLACEFP', 'PLACENAME', 'TYPE', 'COUNTIES'],
+                dtype={'PLACEFP': 'int64', 'PLACENAME': 'str', 'TYPE': 'str', 'COUNTIES': 'str'}
+            )
             print(f"   Loaded {len(df)} total places in Texas")
             
         except Exception as e:
@@ -149,50 +252,50 @@ class CountyBasedDataCollector:
             
         # Filter places to only those in our target counties
         target_county_names = [f"{name} County" for name in self.counties.keys()]
-        target_places = []
+        county_order = {county_name: i for i, county_name in enumerate(target_county_names)}
         
         print(f"\n🔍 Filtering places in target counties...")
-        for county_name in target_county_names:
-            # Find places that have this county in their COUNTIES field
-            county_places = df[df['COUNTIES'].str.contains(county_name, na=False)]
-            
-            for _, place in county_places.iterrows():
-                place_name = place['PLACENAME']
-                place_fips = place['PLACEFP']
-                place_type = place['TYPE']
-                counties_list = place['COUNTIES']
-                
-                # Skip Census Designated Places (CDPs) - focus on incorporated places
-                if place_type == 'CENSUS DESIGNATED PLACE':
-                    continue
-                    
-                # Determine primary county (first one listed, or the one we're processing)
-                counties = [c.strip() for c in counties_list.split('~~~')]
-                primary_county = county_name.replace(' County', '')
-                
-                # If this place spans multiple counties, we might already have it
-                existing = next((p for p in target_places if p['place_fips'] == place_fips), None)
-                if existing:
-                    # Add this county to the existing entry
-                    if primary_county not in existing['counties']:
-                        existing['counties'].append(primary_county)
-                else:
-                    # New place
-                    target_places.append({
-                        'name': place_name,
-                        'place_fips': place_fips,
-                        'counties': [primary_county],
-                        'all_counties': counties_list,
-                        'type': place_type
-                    })
+        # Skip Census Designated Places (CDPs) - focus on incorporated places
+        places = df[df['TYPE'] != 'CENSUS DESIGNATED PLACE'].dropna(subset=['COUNTIES'])
+        
+        # One row per (place, county) pair, limited to the target counties
+        pairs = places.assign(county_name=places['COUNTIES'].str.split('~~~')).explode('county_name')
+        pairs['county_name'] = pairs['county_name'].str.strip()
+        pairs = pairs[pairs['county_name'].isin(county_order)]
+        
+        # Order by county as configured, then file order, so each place's first
+        # county is the first configured county it falls in
+        pairs = pairs.assign(county_rank=pairs['county_name'].map(county_order))
+        pairs = pairs.sort_values('county_rank', kind='stable')
+        pairs['county'] = pairs['county_name'].str.slice(stop=-len(' County'))
+        
+        # Places spanning several counties collapse into one entry with all of them
+        grouped = pairs.groupby('PLACEFP', sort=False).agg(
+            name=('PLACENAME', 'first'),
+            counties=('county', list),
+            all_counties=('COUNTIES', 'first'),
+            type=('TYPE', 'first'),
+        )
+        target_places = [
+            {
+                'name': name,
+                'place_fips': place_fips,
+                'counties': counties,
+                'all_counties': all_counties,
+                'type': place_type
+            }
+            for place_fips, name, counties, all_counties, place_type in grouped.itertuples(name=None)
+        ]
                     
         print(f"✅ Found {len(target_places)} unique places in target counties")
         
         # Verify target cities are included
         missing_cities = ['Celina', 'Melissa', 'Sherman']
         found_targets = []
+        place_names_lc = [(p['name'].lower(), p) for p in target_places]  # lowercase once, not per city
         for city in missing_cities:
-            found = [p for p in target_places if city.lower() in p['name'].lower()]
+            city_lc = city.lower()
+            found = [p for name_lc, p in place_names_lc if city_lc in name_lc]
             if found:
                 for f in found:
                     counties_str = ', '.join(f['counties'])
@@ -212,7 +315,6 @@ class CountyBasedDataCollector:
         print(f"🔄 Checking for missing coordinate/distance data...")
         
         try:
-            import pandas as pd
             df = pd.read_csv(output_file)
             
             # Check what columns are missing
@@ -234,35 +336,29 @@ class CountyBasedDataCollector:
                 else:
                     df[col] = None
                     
-            # Fill in missing coordinate and distance data
-            updated_count = 0
-            for idx, row in df.iterrows():
-                place_fips_int = int(row['place_fips'])
-                
-                # Check if this record needs coordinate data
-                needs_update = (pd.isna(row.get('coordinates')) or 
-                              row.get('coordinates') == '' or
-                              pd.isna(row.get('distance_from_dallas')) or
-                              row.get('distance_from_dallas') == 0)
-                
-                if needs_update and place_fips_int in self.coordinates_lookup:
-                    coord_data = self.coordinates_lookup[place_fips_int]
-                    df.at[idx, 'latitude'] = coord_data['latitude']
-                    df.at[idx, 'longitude'] = coord_data['longitude']
-                    df.at[idx, 'coordinates'] = coord_data['coordinates']
-                    
-                    # Calculate distance from Dallas
-                    city_coords = (coord_data['latitude'], coord_data['longitude'])
-                    distance = self.calculate_distance(self.dallas_coords, city_coords)
-                    df.at[idx, 'distance_from_dallas'] = round(distance, 1)
-                    
-                    updated_count += 1
-                elif needs_update:
-                    # Default to Dallas coordinates
-                    df.at[idx, 'latitude'] = self.dallas_coords[0]
-                    df.at[idx, 'longitude'] = self.dallas_coords[1]
-                    df.at[idx, 'coordinates'] = f"({self.dallas_coords[0]}, {self.dallas_coords[1]})"
-                    df.at[idx, 'distance_from_dallas'] = 0.0
+            # Records that need coordinate data, split by whether we know the place
+            coordinates = df['coordinates']
+            distance = df['distance_from_dallas']
+            needs_update = coordinates.isna() | (coordinates == '') | distance.isna() | (distance == 0)
+            
+            # Explicit columns keep the frame usable when no coordinates were loaded
+            coords_df = pd.DataFrame.from_dict(self.coordinates_lookup, orient='index', columns=required_columns)
+            place_fips = df['place_fips'].astype(int)
+            known = needs_update & place_fips.isin(coords_df.index)
+            unknown = needs_update & ~known
+            
+            # Fill in missing coordinate and distance data in bulk
+            if known.any():
+                matched = coords_df.reindex(place_fips[known])
+                for col in required_columns:
+                    df.loc[known, col] = matched[col].to_numpy()
+            updated_count = int(known.sum())
+            
+            # Default to Dallas coordinates
+            df.loc[unknown, 'latitude'] = self.dallas_coords[0]
+            df.loc[unknown, 'longitude'] = self.dallas_coords[1]
+            df.loc[unknown, 'coordinates'] = f"({self.dallas_coords[0]}, {self.dallas_coords[1]})"
+            df.loc[unknown, 'distance_from_dallas'] = 0.0
                     
             # Save updated dataset
             df.to_csv(output_file, index=False)
@@ -271,127 +367,153 @@ class CountyBasedDataCollector:
         except Exception as e:
             print(f"   ⚠️ Error backfilling data: {e}")
             
-    def get_demographic_data(self, place_fips, year: int, max_retries: int = 3) -> Dict:
-        """Get demographic data for a specific place and year with retry logic"""
-        
-        # Ensure FIPS code is zero-padded to 5 digits (handle both string and int input)
-        place_fips_padded = str(place_fips).zfill(5)
-        
-        # Define the variables we want to collect
-        variables = [
-            'B01003_001E',  # Total population
-            'B02001_002E',  # White alone
-            'B02001_003E',  # Black alone
-            'B02001_005E',  # Asian alone
-            'B02001_008E',  # Two or more races
-            'B03003_003E',  # Hispanic or Latino
-            'B04006_047E',  # German ancestry
-            'B04006_018E',  # Irish ancestry
-            'B04006_010E',  # English ancestry
-            'B04006_065E',  # Mexican ancestry
-            'B04006_001E',  # Total ancestry (for Indian calculation)
-            'B02001_006E',  # American Indian and Alaska Native alone
-            'B04006_077E',  # Chinese ancestry
-            'B04006_024E',  # French ancestry
-            'B04006_039E',  # Italian ancestry
-            'B04006_079E',  # Korean ancestry
-        ]
+    def _demographic_params(self, place_clause: str) -> Dict:
+        """Build Census API query parameters for the given place clause"""
+        return {**self.base_params, 'for': place_clause}
         
-        url = f"{self.base_url}/{year}/acs/acs5"
-        params = {
-            'get': ','.join(['NAME'] + variables),
-            'for': f'place:{place_fips_padded}',
-            'in': 'state:48'
-        }
+    def _cache_path(self, url: str, params: Dict) -> Path:
+        """Cache file for a Census query (the API key is not part of the key)"""
+        query = json.dumps([url, params['get'], params['for'], params['in']])
+        return self.cache_dir / f"{hashlib.sha1(query.encode()).hexdigest()}.json"
         
-        if self.api_key:
-            params['key'] = self.api_key
-            
+    def _cache_max_age(self, year: int):
+        """Seconds a cached response for this ACS year stays valid (None = forever)
+        
+        Older vintages are final; the latest releases may still be corrected,
+        so their cached responses are refreshed daily.
+        """
+        return None if year < time.localtime().tm_year - 1 else self.RECENT_CACHE_MAX_AGE
+        
+    def _write_cache(self, cache_file: Path, data: List):
+        """Atomically store a response; worker threads may write concurrently
+        
+        The cache is only an optimization, so a failed write is reported and
+        otherwise ignored rather than failing the fetch.
+        """
+        try:
+            self.cache_dir.mkdir(exist_ok=True)
+            tmp_file = cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
+                json.dump(data, f)
+            tmp_file.replace(cache_file)
+        except OSError as e:
+            print(f"⚠️ Could not write cache {cache_file}: {e}")
+        
+    def _request_census(self, url: str, params: Dict, max_retries: int = 3, max_age: int = None) -> List:
+        """Fetch a Census API response with retry logic, returning the parsed rows
+        
+        Responses are cached on disk and reused while younger than max_age
+        seconds (indefinitely when max_age is None). "No data" answers are
+        cached too, so places without estimates for a year are not re-asked.
+        """
+        cache_file = self._cache_path(url, params)
+        cache_fresh = cache_file.exists() and (
+            max_age is None or time.time() - cache_file.stat().st_mtime < max_age)
+        if not self.refresh_cache and cache_fresh:
+            try:
+                with open(cache_file, 'rb') as f:
+                    return json_loads(f.read()) or None  # [] records a known-empty query
+            except (OSError, ValueError):
+                pass  # Unreadable cache entry - fetch it again
+                
         # Retry logic with exponential backoff
         for attempt in range(max_retries):
+            # Rate limiting
+            self.rate_limiter.acquire()
+            
             try:
                 timeout = 30 + (attempt * 10)  # Increase timeout with each retry
-                response = requests.get(url, params=params, timeout=timeout)
+                response = self.session.get(url, params=params, timeout=timeout)
+                data = json_loads(response.content) if response.status_code == 200 else None
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    if len(data) > 1:  # Has data beyond header
-                        row = data[1]  # First data row
-                        
-                        # Map the response to our expected format
-                        result = {
-                            'name': row[0],
-                            'total_population': int(row[1]) if row[1] and row[1] != '-666666666' else 0,
-                            'white_alone': int(row[2]) if row[2] and row[2] != '-666666666' else 0,
-                            'black_alone': int(row[3]) if row[3] and row[3] != '-666666666' else 0,
-                            'asian_alone': int(row[4]) if row[4] and row[4] != '-666666666' else 0,
-                            'two_or_more_races': int(row[5]) if row[5] and row[5] != '-666666666' else 0,
-                            'hispanic_latino': int(row[6]) if row[6] and row[6] != '-666666666' else 0,
-                            'german': int(row[7]) if row[7] and row[7] != '-666666666' else 0,
-                            'irish': int(row[8]) if row[8] and row[8] != '-666666666' else 0,
-                            'english': int(row[9]) if row[9] and row[9] != '-666666666' else 0,
-                            'mexican': int(row[10]) if row[10] and row[10] != '-666666666' else 0,
-                            'indian': int(row[12]) if row[12] and row[12] != '-666666666' else 0,
-                            'chinese': int(row[13]) if row[13] and row[13] != '-666666666' else 0,
-                            'vietnamese': 0,  # Not available in current ACS
-                            'french': int(row[14]) if row[14] and row[14] != '-666666666' else 0,
-                            'italian': int(row[15]) if row[15] and row[15] != '-666666666' else 0,
-                            'korean': int(row[16]) if row[16] and row[16] != '-666666666' else 0,
-                            'place_fips': place_fips,  # Store original FIPS for consistency
-                            'year': year
-                        }
-                        
-                        return result
-                        
+            except Exception:
+                response = None  # Timeouts and connection errors are retried below
+                
+            # Cache writes stay outside the try so a cache problem never fails the fetch
+            if response is not None:
+                if response.status_code == 200 and len(data) > 1:  # Has data beyond header
+                    self._write_cache(cache_file, data)
+                    return data
+                    
                 elif response.status_code == 204:
                     # No data available for this place/year combination (legitimate)
-                    return None
-                else:
-                    # API error - retry
-                    if attempt < max_retries - 1:
-                        wait_time = 2 ** attempt  # Exponential backoff
-                        time.sleep(wait_time)
-                        continue
-                    else:
-                        return None
-                        
-            except requests.exceptions.Timeout:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
-                    time.sleep(wait_time)
-                    continue
-                else:
-                    return None
-                    
-            except Exception as e:
-                if attempt < max_retries - 1:
-                    wait_time = 2 ** attempt
-                    time.sleep(wait_time)
-                    continue
-                else:
+                    self._write_cache(cache_file, [])
                     return None
                     
+            if attempt < max_retries - 1:
+                wait_time = 2 ** attempt  # Exponential backoff: 1s, 2s, 4s
+                time.sleep(wait_time)
+                
         return None
+        
+    def _parse_demographic_row(self, row: List, place_fips, year: int) -> Dict:
+        """Map a Census API response row to our expected format"""
+        result = {'name': row[0]}
+        for field, i in self.FIELD_MAP:
+            value = row[i]
+            result[field] = 0 if value in self.MISSING_VALUES else int(value)
             
-    def collect_data_for_places(self, places: List[Dict], years: List[int]) -> pd.DataFrame:
+        result['vietnamese'] = 0  # Not available in current ACS
+        result['place_fips'] = place_fips  # Store original FIPS for consistency
+        result['year'] = year
+        return result
+        
+    def get_demographic_data_bulk(self, place_fips_list: List, year: int,
+                                  max_listed: int = 50, max_retries: int = 3) -> Dict[int, Dict]:
+        """Get demographic data for many places in one year, keyed by integer place FIPS
+        
+        Up to max_listed places are requested as a comma-separated place list.
+        Larger sets use the place:* wildcard, which returns every Texas place in
+        a single response that is then filtered locally.
+        """
+        url = f"{self.base_url}/{year}/acs/acs5"
+        original_fips = {int(fips): fips for fips in place_fips_list}
+        results = {}
+        
+        if not original_fips:
+            return results
+            
+        if len(original_fips) > max_listed:
+            place_clause = 'place:*'
+        else:
+            place_clause = 'place:' + ','.join(str(fips).zfill(5) for fips in original_fips)
+            
+        data = self._request_census(url, self._demographic_params(place_clause), max_retries,
+                                    self._cache_max_age(year))
+        if data:
+            # The API appends the geography columns (state, place) to each row
+            place_col = data[0].index('place')
+            for row in data[1:]:
+                fips = int(row[place_col])
+                if fips in original_fips:
+                    results[fips] = self._parse_demographic_row(row, original_fips[fips], year)
+                    
+        return results
+        
+    def collect_data_for_places(self, places: List[Dict], years: List[int],
+                                max_workers: int = 4) -> pd.DataFrame:
         """Collect demographic data for all places across all years with gap tracking"""
         
         output_file = "north_texas_county_demographics.csv"
         
         # Load existing data if available
         existing_data = []
+        existing_keys = set()  # (place_fips, year) pairs we already have
         if Path(output_file).exists():
             existing_df = pd.read_csv(output_file)
             existing_data = existing_df.to_dict('records')
             print(f"📂 Loaded {len(existing_data)} existing records")
             
-        # Track what we already have
-        existing_keys = set()
-        for record in existing_data:
-            key = f"{record['place_fips']}_{record['year']}"
-            existing_keys.add(key)
+            # New records are appended below, so the file must already use our column layout.
+            # Count columns the old file lacked are filled with 0, like unavailable estimates.
+            if list(existing_df.columns) != self.OUTPUT_COLUMNS:
+                pd.DataFrame.from_records(existing_data, columns=self.OUTPUT_COLUMNS).fillna(
+                    self.MISSING_COUNTS).to_csv(output_file, index=False)
+                
+            # Track what we already have
+            existing_keys = set(zip(existing_df['place_fips'].astype(int), existing_df['year'].astype(int)))
             
-        all_data = existing_data.copy()
+        all_data = existing_data
         total_combinations = len(places) * len(years)
         completed = len(existing_data)
         
@@ -407,69 +529,86 @@ class CountyBasedDataCollector:
         timeout_records = []
         no_data_records = []
         
-        for i, place in enumerate(places, 1):
-            place_name = place['name']
-            place_fips = place['place_fips']
-            counties = place['counties']  # List of counties this place is in
-            primary_county = counties[0]  # Use first county as primary
+        # Work out which places each year still needs
+        pending_by_year = {}
+        for year in years:
+            pending = [place for place in places
+                       if (int(place['place_fips']), year) not in existing_keys]
             
-            print(f"\n[{i}/{len(places)}] 🏙️ {place_name} ({', '.join(counties)} County)")
+            if pending:
+                pending_by_year[year] = pending
+            else:
+                print(f"   {year}: ✓ all {len(places)} places already collected")
+                
+        # One bulk request per year (chunked), with years fetched concurrently
+        # over the shared session; results are merged on this thread
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            futures = {
+                pool.submit(self.get_demographic_data_bulk,
+                            [place['place_fips'] for place in pending], year): year
+                for year, pending in pending_by_year.items()
+            }
             
-            for year in years:
-                key = f"{place_fips}_{year}"
+            for future in as_completed(futures):
+                year = futures[future]
+                pending = pending_by_year[year]
+                results = future.result()
+                new_records = []
                 
-                if key in existing_keys:
-                    print(f"   {year}: ✓", end="")
-                    continue
+                for place in pending:
+                    place_name = place['name']
+                    place_fips = place['place_fips']
+                    counties = place['counties']  # List of counties this place is in
+                    primary_county = counties[0]  # Use first county as primary
                     
-                print(f"   {year}: ", end="", flush=True)
-                
-                data = self.get_demographic_data(place_fips, year)
-                
-                if data:
-                    # Add place metadata
-                    data['city'] = place_name
-                    data['county'] = primary_county
-                    data['county_fips'] = self.counties[primary_county]
-                    data['all_counties'] = ', '.join(counties)
+                    data = results.get(int(place_fips))
                     
-                    # Add coordinates and distance if available
-                    place_fips_int = int(place_fips)
-                    if place_fips_int in self.coordinates_lookup:
-                        coord_data = self.coordinates_lookup[place_fips_int]
-                        data['latitude'] = coord_data['latitude']
-                        data['longitude'] = coord_data['longitude']
-                        data['coordinates'] = coord_data['coordinates']
+                    if data:
+                        # Add place metadata
+                        data['city'] = place_name
+                        data['county'] = primary_county
+                        data['county_fips'] = self.counties[primary_county]
+                        data['all_counties'] = ', '.join(counties)
+                        
+                        # Add coordinates and distance if available
+                        place_fips_int = int(place_fips)
+                        if place_fips_int in self.coordinates_lookup:
+                            coord_data = self.coordinates_lookup[place_fips_int]
+                            data['latitude'] = coord_data['latitude']
+                            data['longitude'] = coord_data['longitude']
+                            data['coordinates'] = coord_data['coordinates']
+                            data['distance_from_dallas'] = coord_data['distance_from_dallas']
+                        else:
+                            # Default to Dallas coordinates if not found
+                            data['latitude'] = self.dallas_coords[0]
+                            data['longitude'] = self.dallas_coords[1]
+                            data['coordinates'] = f"({self.dallas_coords[0]}, {self.dallas_coords[1]})"
+                            data['distance_from_dallas'] = 0.0
+                        
+                        new_records.append(data)
+                        existing_keys.add((int(place_fips), year))
+                        completed += 1
                         
-                        # Calculate distance from Dallas
-                        city_coords = (coord_data['latitude'], coord_data['longitude'])
-                        distance = self.calculate_distance(self.dallas_coords, city_coords)
-                        data['distance_from_dallas'] = round(distance, 1)
                     else:
-                        # Default to Dallas coordinates if not found
-                        data['latitude'] = self.dallas_coords[0]
-                        data['longitude'] = self.dallas_coords[1]
-                        data['coordinates'] = f"({self.dallas_coords[0]}, {self.dallas_coords[1]})"
-                        data['distance_from_dallas'] = 0.0
-                    
-                    all_data.append(data)
-                    existing_keys.add(key)
-                    completed += 1
-                    print("✅", end="")
-                    
-                    # Save progress after each successful collection
-                    df = pd.DataFrame(all_data)
-                    df.to_csv(output_file, index=False)
-                    
-                else:
-                    # Determine failure type for reporting
-                    failed_records.append((place_name, year))
-                    print("❌", end="")
-                    
-                # Rate limiting
-                time.sleep(0.1 if self.api_key else 0.5)
+                        # Determine failure type for reporting
+                        failed_records.append((place_name, year))
+                        
+                status = "✅" if results else "❌"
+                print(f"   {year}: {status} {len(results)} of {len(pending)} places collected")
+            
+                all_data.extend(new_records)
                 
-            print()  # New line after each city
+                # Save progress after each year by appending only the new rows
+                if new_records:
+                    pd.DataFrame.from_records(new_records, columns=self.OUTPUT_COLUMNS).to_csv(
+                        output_file, mode='a', header=not Path(output_file).exists(), index=False)
+        except KeyboardInterrupt:
+            # Drop the queued year fetches so Ctrl-C stops promptly; every
+            # year merged so far has already been appended to the CSV
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
                 
         # Final data quality report
         print(f"\n📊 Data Collection Complete!")
@@ -481,7 +620,8 @@ class CountyBasedDataCollector:
             print(f"     (These may be legitimately unavailable for small places)")
             
         # Data completeness check
-        df = pd.DataFrame(all_data)
+        df = pd.DataFrame.from_records(all_data, columns=self.OUTPUT_COLUMNS).fillna(
+            self.MISSING_COUNTS).astype(self.COUNT_DTYPES)
         completeness = len(df) / total_combinations
         
         if completeness >= 0.95:
@@ -514,18 +654,27 @@ class CountyBasedDataCollector:
         # Step 3: Collect demographic data
         df = self.collect_data_for_places(places, years)
         
+        # Distinct place and year counts in one call
+        distinct = df[['city', 'year']].nunique()
+        counties = sorted(df['county'].dropna().unique())
+        
         print(f"\n🎉 Collection Summary:")
-        print(f"   • Places: {df['city'].nunique()}")
-        print(f"   • Years: {len(df['year'].unique())}")
+        print(f"   • Places: {distinct['city']}")
+        print(f"   • Years: {distinct['year']}")
         print(f"   • Total records: {len(df)}")
-        print(f"   • Counties: {', '.join(sorted(df['county'].unique()))}")
+        print(f"   • Counties: {', '.join(counties)}")
         print(f"   • Output file: north_texas_county_demographics.csv")
         print(f"\n✅ Ready for visualization!")
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description="Collect North Texas demographic data from the Census API")
+    parser.add_argument('--refresh', action='store_true',
+                        help="ignore cached Census responses and fetch everything again")
+    args = parser.parse_args()
+    
     try:
-        collector = CountyBasedDataCollector()
+        collector = CountyBasedDataCollector(refresh_cache=args.refresh)
         collector.run_collection()
         
     except KeyboardInterrupt:
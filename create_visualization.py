@@ -4,11 +4,59 @@ Simple Expanded Visualization for Incremental Data
 Creates visualizations from the incremental collector output
 """
 
+import json
 import pandas as pd
+import numpy as np
 import folium
-import ast
+from folium.plugins import MarkerCluster
+from branca.element import MacroElement
+from jinja2 import Template
 from pathlib import Path
 
+# Use Arrow's multithreaded CSV reader when pyarrow is installed
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
+# Narrow dtypes for the demographics CSV; counts fit comfortably in int32
+COUNT_COLUMNS = [
+    'total_population', 'white_alone', 'black_alone', 'asian_alone',
+    'two_or_more_races', 'hispanic_latino', 'german', 'irish', 'english',
+    'mexican', 'indian', 'chinese', 'vietnamese', 'french', 'italian', 'korean',
+]
+OTHER_DTYPES = {
+    'year': 'int16',
+    'distance_from_dallas': 'float32',
+    'latitude': 'float64',
+    'longitude': 'float64',
+}
+CSV_DTYPES = {**{column: 'int32' for column in COUNT_COLUMNS}, **OTHER_DTYPES}
+
+def read_demographics_csv(data_file):
+    """Read the demographics CSV, reusing the parsed copy from a previous run"""
+    cache_file = Path(data_file).with_suffix('.pkl')
+    
+    # The cache is only valid if it is newer than the CSV it was parsed from
+    if cache_file.exists() and cache_file.stat().st_mtime >= Path(data_file).stat().st_mtime:
+        try:
+            return pd.read_pickle(cache_file)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable cache {cache_file}: {e}")
+    
+    try:
+        df = pd.read_csv(data_file, dtype=CSV_DTYPES, engine=CSV_ENGINE)
+    except ValueError:
+        # Blank counts (e.g. a column older rows never had) can't be read as int32
+        df = pd.read_csv(data_file, dtype=OTHER_DTYPES, engine=CSV_ENGINE)
+        df[COUNT_COLUMNS] = df[COUNT_COLUMNS].fillna(0).astype('int32')
+    try:
+        df.to_pickle(cache_file)
+    except OSError as e:
+        print(f"⚠️ Could not write cache {cache_file}: {e}")
+    return df
+
 def load_incremental_data():
     """Load the cleaned incremental data"""
     # Try county-based file first, then fall back to older files
@@ -17,100 +65,274 @@ def load_incremental_data():
     if not Path(data_file).exists():
         raise FileNotFoundError(f"Data file not found: {data_file}")
     
-    df = pd.read_csv(data_file)
+    df = read_demographics_csv(data_file)
     print(f"✓ Loaded {len(df)} records for {df['city'].nunique()} cities from {data_file}")
     
-    # Parse coordinates from string format
-    def parse_coords(coord_str):
-        try:
-            if isinstance(coord_str, str):
-                return ast.literal_eval(coord_str)
-            return coord_str
-        except:
-            return None
-    
-    # Handle coordinates - add them if missing
-    if 'coordinates' not in df.columns:
-        print("📍 Adding coordinates for mapping...")
-        df['coordinates'] = df['city'].apply(get_city_coordinates)
-        
-    df['parsed_coords'] = df['coordinates'].apply(parse_coords)
-    
-    # Calculate demographic percentages
-    df['white_pct'] = (df['white_alone'] / df['total_population']) * 100
-    df['black_pct'] = (df['black_alone'] / df['total_population']) * 100
-    df['asian_pct'] = (df['asian_alone'] / df['total_population']) * 100
-    df['hispanic_pct'] = (df['hispanic_latino'] / df['total_population']) * 100
-    df['other_pct'] = 100 - (df['white_pct'] + df['black_pct'] + df['asian_pct'] + df['hispanic_pct'])
-    df['other_pct'] = df['other_pct'].clip(lower=0)
+    if {'latitude', 'longitude'}.issubset(df.columns):
+        # The collector stores coordinates as float columns; use them as-is
+        df = df.rename(columns={'latitude': 'lat', 'longitude': 'lon'})
+    else:
+        # Handle coordinates - add them if missing
+        if 'coordinates' not in df.columns:
+            print("📍 Adding coordinates for mapping...")
+            df['coordinates'] = df['city'].apply(get_city_coordinates)
+            
+        # Parse "(lat, lon)" coordinate strings in one vectorized pass
+        latlon = df['coordinates'].str.strip('()').str.split(',', expand=True)
+        df['lat'] = pd.to_numeric(latlon[0], errors='coerce')
+        df['lon'] = pd.to_numeric(latlon[1], errors='coerce')
+    df = df.drop(columns='coordinates', errors='ignore')
+    
+    # Calculate demographic percentages in one broadcast over the count columns
+    counts = df[['white_alone', 'black_alone', 'asian_alone', 'hispanic_latino']].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pcts = counts / df['total_population'].to_numpy(dtype=float)[:, None] * 100
+    df[['white_pct', 'black_pct', 'asian_pct', 'hispanic_pct']] = pcts
+    df['other_pct'] = np.clip(100 - pcts.sum(axis=1), 0, None)
     
     return df
 
-def get_growth_color(growth_rate):
-    """Get color based on growth rate"""
-    if growth_rate >= 100:
-        return '#8b0000'  # Dark red
-    elif growth_rate >= 50:
-        return '#d73027'  # Red
-    elif growth_rate >= 25:
-        return '#fc8d59'  # Orange
-    elif growth_rate >= 10:
-        return '#fee08b'  # Yellow
-    elif growth_rate >= 0:
-        return '#e0f3f8'  # Light blue
-    else:
-        return '#4575b4'  # Blue
+# Growth-rate bucket edges and the color for each bucket
+GROWTH_BINS = np.array([0, 10, 25, 50, 100])
+GROWTH_COLORS = np.array([
+    '#4575b4',  # Blue (decline)
+    '#e0f3f8',  # Light blue
+    '#fee08b',  # Yellow
+    '#fc8d59',  # Orange
+    '#d73027',  # Red
+    '#8b0000',  # Dark red
+])
+
+def get_growth_colors(growth_rates):
+    """Get colors for an array of growth rates"""
+    return GROWTH_COLORS[np.digitize(growth_rates, GROWTH_BINS)]
+
+# (label, percentage column, color) for each slice of the demographic pie
+DEMOGRAPHIC_SLICES = [
+    ('White', 'white_pct', '#1f77b4'),
+    ('Black', 'black_pct', '#ff7f0e'),
+    ('Asian', 'asian_pct', '#2ca02c'),
+    ('Hispanic', 'hispanic_pct', '#d62728'),
+    ('Other', 'other_pct', '#7f7f7f'),
+]
+
+# Popup and tooltip templates, filled in with str.format per marker
+PIE_SLICE_TEMPLATE = (
+    '<circle r="8" cx="16" cy="16" fill="transparent" stroke="{color}" stroke-width="16" '
+    'pathLength="100" stroke-dasharray="{size:.2f} {gap:.2f}" '
+    'stroke-dashoffset="{offset:.2f}" transform="rotate(-90 16 16)"/>'
+)
+
+LEGEND_ENTRY_TEMPLATE = '<span style="color: {color};">●</span> {label}: {pct:.1f}%'
 
-def create_demographic_popup(row):
-    """Create demographic popup for a city"""
-    return f"""
+DEMOGRAPHIC_POPUP_TEMPLATE = """
     <div style="width: 220px; font-family: Arial, sans-serif;">
-        <h4 style="margin: 0 0 10px 0; color: #2c3e50;">{row['city']} ({int(row['year'])})</h4>
-        <p style="margin: 0 0 5px 0;"><strong>Population:</strong> {int(row['total_population']):,}</p>
-        <p style="margin: 0 0 10px 0; font-size: 11px; color: #666;">Distance: {row['distance_from_dallas']:.1f} miles</p>
-        <div style="margin-bottom: 5px;">
-            <h5 style="margin: 5px 0; color: #34495e;">Demographics:</h5>
-            <div style="display: flex; align-items: center; margin-bottom: 3px;">
-                <div style="width: 15px; height: 15px; background-color: #1f77b4; margin-right: 8px;"></div>
-                <span style="font-size: 12px;">White: {row['white_pct']:.1f}%</span>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 3px;">
-                <div style="width: 15px; height: 15px; background-color: #ff7f0e; margin-right: 8px;"></div>
-                <span style="font-size: 12px;">Black: {row['black_pct']:.1f}%</span>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 3px;">
-                <div style="width: 15px; height: 15px; background-color: #2ca02c; margin-right: 8px;"></div>
-                <span style="font-size: 12px;">Asian: {row['asian_pct']:.1f}%</span>
-            </div>
-            <div style="display: flex; align-items: center; margin-bottom: 3px;">
-                <div style="width: 15px; height: 15px; background-color: #d62728; margin-right: 8px;"></div>
-                <span style="font-size: 12px;">Hispanic: {row['hispanic_pct']:.1f}%</span>
-            </div>
+        <h4 style="margin: 0 0 10px 0; color: #2c3e50;">{city} ({year})</h4>
+        <p style="margin: 0 0 5px 0;"><strong>Population:</strong> {population}</p>
+        <p style="margin: 0 0 10px 0; font-size: 11px; color: #666;">Distance: {distance} miles</p>
+        <h5 style="margin: 5px 0; color: #34495e;">Demographics:</h5>
+        <div style="display: flex; align-items: center;">
+            {pie}
+            <div style="margin-left: 10px; font-size: 12px; line-height: 1.5;">{legend}</div>
         </div>
     </div>
     """
 
-def create_expanded_map(df):
+GROWTH_POPUP_TEMPLATE = """
+            <div style="font-family: Arial;">
+                <h4>{city}</h4>
+                <p><strong>Growth Rate:</strong> {growth:.1f}%</p>
+                <p><strong>2022 Population:</strong> {population:,}</p>
+                <p><strong>Distance:</strong> {distance:.1f} miles</p>
+            </div>
+            """
+
+MARKER_TOOLTIP_TEMPLATE = "{city} - {year} (Pop: {population:,})"
+
+# Years the city markers can be switched between, with their marker color
+MARKER_YEARS = [(2022, 'red'), (2009, 'blue')]
+
+GROWTH_TOOLTIP_TEMPLATE = "{city}: {growth:.1f}% growth"
+
+def create_demographic_popups(df):
+    """Create demographic popups for every row of df"""
+    pcts = df[[column for _, column, _ in DEMOGRAPHIC_SLICES]].to_numpy(dtype=float)
+    
+    # Pie geometry for all rows at once. Hispanic overlaps the race
+    # categories, so slices are scaled to fill the circle.
+    shares = np.where(pcts > 0, pcts, 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sizes = shares / shares.sum(axis=1, keepdims=True) * 100
+    # Each slice starts where the previous ones end (0 - x avoids printing -0.00)
+    dash_offsets = np.zeros_like(sizes)
+    dash_offsets[:, 1:] = 0 - np.cumsum(sizes, axis=1)[:, :-1]
+    
+    populations = df['total_population'].map('{:,}'.format)
+    distances = df['distance_from_dallas'].map('{:.1f}'.format)
+    
+    popups = []
+    for city, year, population, distance, row_pcts, row_sizes, row_offsets in zip(
+            df['city'], df['year'], populations, distances, pcts, sizes, dash_offsets):
+        pie = ''.join(
+            PIE_SLICE_TEMPLATE.format(color=color, size=size, gap=100 - size, offset=offset)
+            for (_, _, color), size, offset in zip(DEMOGRAPHIC_SLICES, row_sizes, row_offsets)
+            if size > 0
+        )
+        legend = '<br>'.join(
+            LEGEND_ENTRY_TEMPLATE.format(color=color, label=label, pct=pct)
+            for (label, _, color), pct in zip(DEMOGRAPHIC_SLICES, row_pcts)
+        )
+        popups.append(DEMOGRAPHIC_POPUP_TEMPLATE.format(
+            city=city,
+            year=year,
+            population=population,
+            distance=distance,
+            pie=f'<svg width="80" height="80" viewBox="0 0 32 32">{pie}</svg>',
+            legend=legend
+        ))
+    
+    return pd.Series(popups, index=df.index)
+
+def to_script_json(data):
+    """Serialize data for embedding inside a <script> tag"""
+    # Escape "</" so popup HTML cannot close the enclosing tag
+    return json.dumps(data).replace('</', '<\\/')
+
+class CircleMarkerLayer(MacroElement):
+    """Circle markers drawn client-side from one embedded JSON array
+    
+    Avoids rendering a separate folium CircleMarker (and its popup and
+    tooltip elements) for every city.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            {{ this.data }}.forEach(function (d) {
+                L.circleMarker([d.lat, d.lon], {
+                    radius: d.radius,
+                    color: 'black',
+                    weight: 1,
+                    fillColor: d.color,
+                    fillOpacity: 0.7
+                })
+                .bindPopup(d.popup, {maxWidth: 300})
+                .bindTooltip(d.tooltip, {sticky: true})
+                .addTo({{ this._parent.get_name() }});
+            });
+        {% endmacro %}
+    """)
+    
+    def __init__(self, markers):
+        super().__init__()
+        self._name = 'CircleMarkerLayer'
+        self.data = to_script_json(markers)
+
+class YearToggleMarkers(MacroElement):
+    """One marker per city with a map control to switch the year shown
+    
+    Each row is [lat, lon, popup, tooltip, popup, tooltip, ...] with one
+    popup/tooltip pair per entry in years (null when the city has no data
+    for that year). Switching years re-binds the existing markers instead
+    of keeping a second full set of markers in the page.
+    """
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+            (function () {
+                var cluster = {{ this.cluster.get_name() }};
+                var rows = {{ this.data }};
+                var years = {{ this.years }};
+                var markers = rows.map(function (r) { return L.marker([r[0], r[1]]); });
+                
+                function showYear(i) {
+                    var icon = L.AwesomeMarkers.icon({
+                        extraClasses: 'fa-rotate-0',
+                        icon: 'info-sign',
+                        iconColor: 'white',
+                        markerColor: years[i].color,
+                        prefix: 'glyphicon'
+                    });
+                    var visible = [];
+                    rows.forEach(function (r, j) {
+                        var popup = r[2 + 2 * i];
+                        if (popup === null) {
+                            return;
+                        }
+                        markers[j].setIcon(icon)
+                            .bindPopup(popup, {maxWidth: 250})
+                            .bindTooltip(r[3 + 2 * i], {sticky: true});
+                        visible.push(markers[j]);
+                    });
+                    cluster.clearLayers();
+                    cluster.addLayers(visible);
+                }
+                
+                var control = L.control({position: 'topright'});
+                control.onAdd = function () {
+                    var div = L.DomUtil.create('div', 'leaflet-bar');
+                    div.style.background = 'white';
+                    div.style.padding = '6px 8px';
+                    div.style.font = '12px Arial, sans-serif';
+                    div.innerHTML = years.map(function (y, i) {
+                        return '<label style="display: block;"><input type="radio" name="marker-year" value="' + i + '"'
+                            + (i === 0 ? ' checked' : '') + '> ' + y.year + ' Demographics</label>';
+                    }).join('');
+                    L.DomEvent.disableClickPropagation(div);
+                    L.DomEvent.on(div, 'change', function (e) { showYear(+e.target.value); });
+                    return div;
+                };
+                control.addTo({{ this._parent.get_name() }});
+                
+                showYear(0);
+            })();
+        {% endmacro %}
+    """)
+    
+    def __init__(self, cluster, rows, years):
+        super().__init__()
+        self._name = 'YearToggleMarkers'
+        self.cluster = cluster
+        self.data = to_script_json(rows)
+        self.years = to_script_json([{'year': year, 'color': color} for year, color in years])
+
+def compute_growth_stats(df):
+    """Compute the 2009/2022 figures shared by the map and the dashboard"""
+    # Index by (city, year) once; year slices are index lookups
+    # instead of full-length boolean masks. A duplicated (city, year)
+    # record keeps its first row, as the per-city lookups always did.
+    first_rows = df.drop_duplicates(['city', 'year'])
+    by_city_year = first_rows.set_index(['city', 'year'], drop=False).sort_index()
+    
+    # A collection may be missing a whole year; its slice is then empty
+    collected_years = by_city_year.index.get_level_values('year')
+    rows_2009, rows_2022 = (
+        by_city_year.xs(year, level='year') if year in collected_years
+        else by_city_year.iloc[:0].droplevel('year')
+        for year in (2009, 2022)
+    )
+    
+    # Calculate growth rates
+    pop = by_city_year['total_population'].unstack('year').reindex(columns=[2009, 2022])
+    pop_2009 = pop[2009][pop[2009] > 0]
+    pop_2022 = pop[2022].dropna()
+    growth = ((pop_2022 - pop_2009) / pop_2009 * 100).dropna()
+    
+    return {
+        'rows_2009': rows_2009,
+        'rows_2022': rows_2022,
+        'pop_2022': pop_2022,
+        'growth': growth,
+        # Dashboard rankings, taken from the same population table
+        'top_growth': growth.nlargest(5),
+        'largest': pop_2022.nlargest(5),
+    }
+
+def create_expanded_map(df, stats):
     """Create the main expanded map"""
     print("Creating expanded interactive map...")
     
-    # Calculate growth rates
-    df_2009 = df[df['year'] == 2009].set_index('city')
-    df_2022 = df[df['year'] == 2022].set_index('city')
-    
-    growth_rates = {}
-    for city in df_2009.index:
-        if city in df_2022.index:
-            pop_2009 = df_2009.loc[city, 'total_population']
-            pop_2022 = df_2022.loc[city, 'total_population']
-            # Handle Series by getting the first value if it's a Series
-            if hasattr(pop_2009, 'iloc'):
-                pop_2009 = pop_2009.iloc[0] if len(pop_2009) > 0 else 0
-            if hasattr(pop_2022, 'iloc'):
-                pop_2022 = pop_2022.iloc[0] if len(pop_2022) > 0 else 0
-            
-            if pop_2009 > 0:
-                growth_rates[city] = ((pop_2022 - pop_2009) / pop_2009) * 100
+    rows_by_year = {year: stats[f'rows_{year}'] for year, _ in MARKER_YEARS}
+    
+    # Circle size scales with 2022 population
+    radii = np.clip(stats['pop_2022'].dropna() / 8000, 5, 35)
     
     # Create map centered on North Texas
     m = folium.Map(
@@ -130,98 +352,74 @@ def create_expanded_map(df):
     '''
     m.get_root().html.add_child(folium.Element(title_html))
     
-    # Create feature groups
-    fg_2022 = folium.FeatureGroup(name='2022 Demographics', show=True)
-    fg_2009 = folium.FeatureGroup(name='2009 Demographics')
+    # Create feature groups; city markers are clustered so the browser
+    # only draws what is visible at the current zoom
+    fg_cities = MarkerCluster(name='City Demographics', show=True)
     fg_growth = folium.FeatureGroup(name='Population Growth')
     
     # Process each city
-    cities_processed = set()
     cities_with_coords = 0
     cities_without_coords = []
-    
-    # Get unique cities from the dataset
-    unique_cities = df['city'].unique()
-    print(f"Processing {len(unique_cities)} unique cities from dataset...")
-    
-    for city in unique_cities:
-        if city in cities_processed:
-            continue
-            
-        # Get any row for this city to get coordinates
-        city_rows = df[df['city'] == city]
-        if city_rows.empty:
-            continue
-            
-        # Get coordinates from the first row
-        sample_row = city_rows.iloc[0]
-        coords = sample_row['parsed_coords']
+    marker_rows = []
+    growth_markers = []
+    
+    # Pull everything the loop needs into plain dicts so each city is a
+    # handful of hash lookups rather than Series/iloc indexing
+    first_rows = df.drop_duplicates('city')[['city', 'lat', 'lon', 'distance_from_dallas']]
+    popups = {year: create_demographic_popups(rows).to_dict() for year, rows in rows_by_year.items()}
+    pops = {year: rows['total_population'].to_dict() for year, rows in rows_by_year.items()}
+    radii = radii.to_dict()
+    
+    # Bucket every city's growth rate into a color in one call
+    growth_rates = first_rows['city'].map(stats['growth']).fillna(0).to_numpy()
+    growth_colors = get_growth_colors(growth_rates)
+    print(f"Processing {len(first_rows)} unique cities from dataset...")
+    
+    for (city, lat, lon, distance), growth_rate, color in zip(
+            first_rows.itertuples(index=False, name=None), growth_rates, growth_colors):
+        # Coordinates come from the city's first row
+        coords = (lat, lon)
         
-        if not coords:
+        if np.isnan(lat) or np.isnan(lon):
             cities_without_coords.append(city)
             continue
             
-        cities_processed.add(city)
         cities_with_coords += 1
         
-        # Get city data for different years
-        city_data = df[df['city'] == city]
-        
-        # 2022 data
-        data_2022 = city_data[city_data['year'] == 2022]
-        if not data_2022.empty:
-            row_2022 = data_2022.iloc[0]
-            popup_2022 = create_demographic_popup(row_2022)
-            
-            folium.Marker(
-                coords,
-                popup=folium.Popup(popup_2022, max_width=250),
-                tooltip=f"{city} - 2022 (Pop: {int(row_2022['total_population']):,})",
-                icon=folium.Icon(color='red', icon='info-sign')
-            ).add_to(fg_2022)
-        
-        # 2009 data
-        data_2009 = city_data[city_data['year'] == 2009]
-        if not data_2009.empty:
-            row_2009 = data_2009.iloc[0]
-            popup_2009 = create_demographic_popup(row_2009)
-            
-            folium.Marker(
-                coords,
-                popup=folium.Popup(popup_2009, max_width=250),
-                tooltip=f"{city} - 2009 (Pop: {int(row_2009['total_population']):,})",
-                icon=folium.Icon(color='blue', icon='info-sign')
-            ).add_to(fg_2009)
+        # Popup and tooltip for each year the marker can be switched to
+        marker_row = [lat, lon]
+        for year, _ in MARKER_YEARS:
+            if city in pops[year]:
+                marker_row.append(popups[year][city])
+                marker_row.append(MARKER_TOOLTIP_TEMPLATE.format(city=city, year=year, population=int(pops[year][city])))
+            else:
+                marker_row.extend([None, None])
+        marker_rows.append(marker_row)
         
         # Growth visualization
-        growth_rate = growth_rates.get(city, 0)
-        color = get_growth_color(growth_rate)
-        
         # Get 2022 population for circle size
-        pop_2022 = data_2022.iloc[0]['total_population'] if not data_2022.empty else 0
-        radius = max(5, min(35, pop_2022 / 8000))
+        pop_2022 = pops[2022].get(city, 0)
+        radius = radii.get(city, 5)
         
-        folium.CircleMarker(
-            coords,
-            radius=radius,
-            popup=f"""
-            <div style="font-family: Arial;">
-                <h4>{city}</h4>
-                <p><strong>Growth Rate:</strong> {growth_rate:.1f}%</p>
-                <p><strong>2022 Population:</strong> {int(pop_2022):,}</p>
-                <p><strong>Distance:</strong> {sample_row['distance_from_dallas']:.1f} miles</p>
-            </div>
-            """,
-            tooltip=f"{city}: {growth_rate:.1f}% growth",
-            color='black',
-            weight=1,
-            fillColor=color,
-            fillOpacity=0.7
-        ).add_to(fg_growth)
+        growth_markers.append({
+            'lat': lat,
+            'lon': lon,
+            'radius': radius,
+            'color': color,
+            'popup': GROWTH_POPUP_TEMPLATE.format(
+                city=city,
+                growth=growth_rate,
+                population=int(pop_2022),
+                distance=distance
+            ),
+            'tooltip': GROWTH_TOOLTIP_TEMPLATE.format(city=city, growth=growth_rate)
+        })
+    
+    CircleMarkerLayer(growth_markers).add_to(fg_growth)
     
     # Add layers to map
-    fg_2022.add_to(m)
-    fg_2009.add_to(m)
+    fg_cities.add_to(m)
+    YearToggleMarkers(fg_cities, marker_rows, MARKER_YEARS).add_to(m)
     fg_growth.add_to(m)
     
     # Add layer control
@@ -260,38 +458,37 @@ def create_expanded_map(df):
     
     return m
 
-def create_dashboard(df):
+def create_dashboard(df, stats):
     """Create HTML dashboard"""
     # Calculate statistics
     total_cities = df['city'].nunique()
-    total_population_2022 = df[df['year'] == 2022]['total_population'].sum()
-    total_population_2009 = df[df['year'] == 2009]['total_population'].sum()
-    overall_growth = ((total_population_2022 - total_population_2009) / total_population_2009) * 100
-    
-    # Get top growing cities
-    df_2009 = df[df['year'] == 2009].set_index('city')
-    df_2022 = df[df['year'] == 2022].set_index('city')
-    
-    growth_data = []
-    for city in df_2009.index:
-        if city in df_2022.index:
-            pop_2009 = df_2009.loc[city, 'total_population']
-            pop_2022 = df_2022.loc[city, 'total_population']
-            # Handle Series by getting the first value if it's a Series
-            if hasattr(pop_2009, 'iloc'):
-                pop_2009 = pop_2009.iloc[0] if len(pop_2009) > 0 else 0
-            if hasattr(pop_2022, 'iloc'):
-                pop_2022 = pop_2022.iloc[0] if len(pop_2022) > 0 else 0
-            
-            if pop_2009 > 0:
-                growth_rate = ((pop_2022 - pop_2009) / pop_2009) * 100
-                growth_data.append((city, growth_rate, pop_2022))
-    
-    growth_data.sort(key=lambda x: x[1], reverse=True)
-    top_5_growth = growth_data[:5]
-    
-    # Get largest cities
-    largest_cities = df[df['year'] == 2022].nlargest(5, 'total_population')
+    year_totals = df.loc[df['year'].isin([2009, 2022])].groupby('year')['total_population'].sum()
+    total_population_2022 = year_totals.get(2022, 0)
+    total_population_2009 = year_totals.get(2009, 0)
+    if total_population_2009 > 0:
+        overall_growth = ((total_population_2022 - total_population_2009) / total_population_2009) * 100
+    else:
+        overall_growth = 0.0
+    
+    # Get top growing and largest cities
+    top_5_growth = stats['top_growth']
+    largest_cities = stats['largest']
+    
+    # Ranking tables rendered by pandas
+    growth_table = top_5_growth.rename('growth').reset_index().to_html(
+        index=False,
+        header=False,
+        border=0,
+        classes='city-list growth-list',
+        formatters={'growth': '{:.1f}%'.format}
+    )
+    largest_table = largest_cities.rename('population').reset_index().to_html(
+        index=False,
+        header=False,
+        border=0,
+        classes='city-list',
+        formatters={'population': lambda population: f'{int(population):,}'}
+    )
     
     html_content = f"""
 <!DOCTYPE html>
@@ -362,16 +559,17 @@ def create_dashboard(df):
             box-shadow: 0 8px 32px rgba(0,0,0,0.1);
         }}
         .city-list {{
-            list-style: none;
-            padding: 0;
+            width: 100%;
+            border-collapse: collapse;
         }}
-        .city-list li {{
+        .city-list td {{
             padding: 8px 0;
             border-bottom: 1px solid #eee;
-            display: flex;
-            justify-content: space-between;
         }}
-        .growth-rate {{
+        .city-list td:last-child {{
+            text-align: right;
+        }}
+        .growth-list td:last-child {{
             font-weight: bold;
             color: #e74c3c;
         }}
@@ -411,32 +609,12 @@ def create_dashboard(df):
     <div class="insights-grid">
         <div class="insight-card">
             <h3>Fastest Growing Cities</h3>
-            <ul class="city-list">"""
-    
-    for city, growth_rate, pop_2022 in top_5_growth:
-        html_content += f"""
-                <li>
-                    <span>{city}</span>
-                    <span class="growth-rate">{growth_rate:.1f}%</span>
-                </li>"""
-    
-    html_content += """
-            </ul>
+            {growth_table}
         </div>
         
         <div class="insight-card">
             <h3>Largest Cities (2022)</h3>
-            <ul class="city-list">"""
-    
-    for _, row in largest_cities.iterrows():
-        html_content += f"""
-                <li>
-                    <span>{row['city']}</span>
-                    <span>{int(row['total_population']):,}</span>
-                </li>"""
-    
-    html_content += """
-            </ul>
+            {largest_table}
         </div>
         
         <div class="insight-card">
@@ -466,15 +644,18 @@ def main():
         # Load data
         df = load_incremental_data()
         
+        # Growth figures are shared by the map and the dashboard
+        stats = compute_growth_stats(df)
+        
         # Create map
         print("📍 Creating interactive map...")
-        expanded_map = create_expanded_map(df)
+        expanded_map = create_expanded_map(df, stats)
         expanded_map.save('north_texas_cities_map.html')
         print("✓ Saved: north_texas_cities_map.html")
         
         # Create dashboard
         print("📊 Creating dashboard...")
-        dashboard_html = create_dashboard(df)
+        dashboard_html = create_dashboard(df, stats)
         with open('north_texas_cities_dashboard.html', 'w') as f:
             f.write(dashboard_html)
         print("✓ Saved: north_texas_cities_dashboard.html")
@@ -492,9 +673,9 @@ def main():
         
         # Show top cities by population
         print(f"\n🏙️ Top 10 Cities by 2022 Population:")
-        top_cities = df[df['year'] == 2022].nlargest(10, 'total_population')
-        for i, (_, row) in enumerate(top_cities.iterrows(), 1):
-            print(f"  {i:2d}. {row['city']:<25} {int(row['total_population']):>8,}")
+        top_cities = stats['pop_2022'].nlargest(10)
+        print('\n'.join(f"  {i:2d}. {city:<25} {int(population):>8,}"
+                        for i, (city, population) in enumerate(top_cities.items(), 1)))
         
     except Exception as e:
         print(f"❌ Error: {e}")
@@ -4,7 +4,6 @@ Simple web server to serve the North Texas demographic visualizations
 """
 
 import http.server
-import socketserver
 import webbrowser
 import os
 from pathlib import Path
@@ -31,7 +30,8 @@ def start_server(port=8000):
     Handler = http.server.SimpleHTTPRequestHandler
     
     try:
-        with socketserver.TCPServer(("", port), Handler) as httpd:
+        # Threaded server so the page's scripts, styles and data load in parallel
+        with http.server.ThreadingHTTPServer(("", port), Handler) as httpd:
             print(f"🌐 Starting web server at http://localhost:{port}")
             print(f"📊 Primary Dashboard: http://localhost:{port}/{primary_dashboard}")
             